@@ -1,8 +1,9 @@
-from typing import Optional, Tuple, Set
+import sys
+from typing import AbstractSet, Dict, Optional, Tuple
 from ._grammar_old import productions_common1, productions_pre_1_0, productions_1_0, productions_1_1
 
 # Keywords for each version of the WDL grammar.
-keywords = {}
+keywords: Dict[str, AbstractSet[str]] = {}
 keywords["draft-2"] = set(
     "Array File Float Int Map None Pair String"
     " as call command else false if import input left meta object output"
@@ -12,6 +13,9 @@ keywords["1.0"] = keywords["draft-2"] | set(["alias", "struct"])
 keywords["1.1"] = keywords["1.0"]
 keywords["1.2"] = keywords["1.1"] | set(["Directory", "env", "requirements"])
 keywords["development"] = keywords["1.2"]
+# intern the keywords so that membership tests against interned identifiers reduce to cached-hash
+# and identity comparisons (_parser._check_keyword runs on ~every named node in a document)
+keywords = {version: frozenset(sys.intern(word) for word in kw) for version, kw in keywords.items()}
 
 # Grammar versions and their definitions. The productions for WDL 1.2 and development will be
 # defined in this file, while older versions are found in _grammar_old.py.
@@ -245,6 +249,6 @@ COMMENT: /[ \t]*/ "#" /[^\r\n]*/
 versions["1.2"] = versions["development"]
 
 
-def get(version: Optional[str] = None) -> Tuple[str, Set[str]]:
+def get(version: Optional[str] = None) -> Tuple[str, AbstractSet[str]]:
     version = version or "1.0"
     return (versions[version], keywords[version])